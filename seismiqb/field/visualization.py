@@ -328,8 +328,10 @@ class VisualizationMixin:
             plot_config['savepath'] = self.make_path(savepath, name=first_label_name)
 
         # Plot image with given params and return resulting figure
+        # Redraw only if the figure is requested to be shown: otherwise, the caller renders it later
         plotter_ = plotter(mode=mode, show=show, **plot_config)
-        plotter_.force_show()
+        if show:
+            plotter_.force_show()
         return plotter_
 
     # Auxilary methods utilized by `show`
@@ -2,6 +2,7 @@
 from warnings import warn
 
 import numpy as np
+from scipy import fft as scipy_fft
 try:
     import cupy as cp
     CUPY_AVAILABLE = True
@@ -45,12 +46,17 @@ def from_device(array):
 
 # Helper functions
 def hilbert(array, axis=-1):
-    """ Compute the analytic signal, using the Hilbert transform. """
+    """ Compute the analytic signal, using the Hilbert transform.
+    On CPU, transforms are done by multi-threaded `scipy.fft`, which also keeps single precision of inputs.
+    """
     xp = cp.get_array_module(array) if CUPY_AVAILABLE else np
+    fft_module = xp.fft if xp is not np else scipy_fft
+    fft_kwargs = {} if xp is not np else {'workers': -1}
+
     N = array.shape[axis]
-    fft = xp.fft.fft(array, n=N, axis=axis)
+    fft = fft_module.fft(array, n=N, axis=axis, **fft_kwargs)
 
-    h = xp.zeros(N)
+    h = xp.zeros(N, dtype=fft.real.dtype)
     if N % 2 == 0:
         h[0] = h[N // 2] = 1
         h[1:N // 2] = 2
@@ -63,7 +69,7 @@ def hilbert(array, axis=-1):
         ind[axis] = slice(None)
         h = h[tuple(ind)]
 
-    result = xp.fft.ifft(fft * h, axis=axis)
+    result = fft_module.ifft(fft * h, axis=axis, **fft_kwargs)
     return result
 
 def compute_instantaneous_amplitude(array, axis=-1):
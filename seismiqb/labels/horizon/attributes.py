@@ -1,21 +1,22 @@
 """ Mixin with computed along horizon geological attributes. """
 # pylint: disable=too-many-statements
 from copy import copy
-from functools import cached_property, wraps
+from functools import cached_property, wraps, lru_cache as lru_cache_functools
 
 from math import isnan
 import numpy as np
+import numexpr
 from numba import njit, prange
 
-from cv2 import dilate
+from cv2 import dilate, erode, BORDER_CONSTANT
+from scipy.fft import rfft
 from scipy.signal import ricker
-from scipy.ndimage import convolve
-from scipy.ndimage.morphology import binary_dilation, binary_fill_holes, binary_erosion
-from skimage.measure import label
+from scipy.ndimage import convolve1d, label
+from scipy.ndimage.morphology import binary_dilation
 from sklearn.decomposition import PCA
 
 from ...functional import hilbert
-from ...utils import transformable, lru_cache
+from ...utils import transformable, lru_cache, fill_holes
 
 
 
@@ -63,7 +64,7 @@ class AttributesMixin:
             fill_value = self.FILL_VALUE
         elif dtype == np.float32:
             fill_value = np.nan
-        elif np.issubdtype(dtype, np.bool):
+        elif np.issubdtype(dtype, np.bool_):
             fill_value = False
         else:
             raise TypeError(f'Incorrect dtype: `{dtype}`')
@@ -71,20 +72,25 @@ class AttributesMixin:
 
     def matrix_set_dtype(self, matrix, dtype):
         """ Change the dtype and fill_value to match it. """
-        matrix = matrix.astype(dtype)
-        mask = self._matrix_absence_mask(matrix)
-        matrix[mask] = self._dtype_to_fill_value(dtype)
-        return matrix
+        # Cast only the present points onto the filled background: one pass and no inverted mask
+        presence = self._matrix_presence_mask(matrix)
+        presence = presence.reshape(presence.shape + (1,) * (matrix.ndim - 2))
+
+        result = np.full(matrix.shape, self._dtype_to_fill_value(dtype), dtype=dtype)
+        np.copyto(result, matrix, where=presence, casting='unsafe')
+        return result
 
-    def matrix_put_on_full(self, matrix):
-        """ Convert matrix from being horizon-shaped to cube-shaped. """
+    def matrix_put_on_full(self, matrix, inplace=False):
+        """ Convert matrix from being horizon-shaped to cube-shaped.
+        If `inplace` is True and the matrix is already cube-shaped, it is returned as is, without allocations.
+        """
         if matrix.shape[:2] != self.field.spatial_shape:
-            background = np.full(shape=self.field.spatial_shape,
+            background = np.full(shape=(*self.field.spatial_shape, *matrix.shape[2:]),
                                  fill_value=self._dtype_to_fill_value(matrix.dtype),
                                  dtype=matrix.dtype)
             background[self.i_min:self.i_max + 1, self.x_min:self.x_max + 1] = matrix
         else:
-            background = matrix.copy()
+            background = matrix if inplace else matrix.copy()
         return background
 
     def matrix_fill_to_num(self, matrix, value):
@@ -95,11 +101,15 @@ class AttributesMixin:
 
     def _matrix_absence_mask(self, matrix):
         """ Provide bool mask of horizon absence points consistent with shape of given matrix. """
+        return ~self._matrix_presence_mask(matrix)
+
+    def _matrix_presence_mask(self, matrix):
+        """ Provide bool mask of horizon presence points consistent with shape of given matrix. """
         if matrix.shape[:2] == self.shape:
-            return ~self.binary_matrix
+            return self.binary_matrix
         if matrix.shape[:2] == self.field.spatial_shape:
-            return ~self.full_binary_matrix
-        msg = f"Can't define horizon absence mask with respect to provided matrix since its shape {matrix.shape} "\
+            return self.full_binary_matrix
+        msg = f"Can't define horizon presence mask with respect to provided matrix since its shape {matrix.shape} "\
                 f"doesn't coincide with either horizon shape {self.shape} or field shape {self.field.spatial_shape}."
         raise ValueError(msg)
 
@@ -122,16 +132,21 @@ class AttributesMixin:
             If `min-max` or True, then use min-max scaling.
             If `mean-std`, then use mean-std scaling.
         """
-        values = matrix[self.full_binary_matrix]
+        # All of the statistics are computed in one pass over the horizon points, without copying them
+        min_, max_, mean, std = _masked_nan_stats(matrix.reshape(*matrix.shape[:2], -1), self.full_binary_matrix)
 
         if mode in ['min-max', True]:
-            min_, max_ = np.nanmin(values), np.nanmax(values)
-            matrix = (matrix - min_) / (max_ - min_)
+            shift, scale = min_, max_ - min_
         elif mode == 'mean-std':
-            mean, std = np.nanmean(values), np.nanstd(values)
-            matrix = (matrix - mean) / std
+            shift, scale = mean, std
         else:
             raise ValueError(f'Unknown normalization mode `{mode}`.')
+
+        # Scalars of the matrix dtype prevent numexpr from upcasting float32 matrices to float64
+        dtype = matrix.dtype if np.issubdtype(matrix.dtype, np.floating) else np.float32
+        shift, scale = np.dtype(dtype).type(shift), np.dtype(dtype).type(scale)
+        matrix = numexpr.evaluate('(matrix - shift) / scale',
+                                  local_dict={'matrix': matrix, 'shift': shift, 'scale': scale})
         return matrix
 
     def matrix_enlarge(self, matrix, width=3):
@@ -140,7 +155,8 @@ class AttributesMixin:
             return matrix
 
         # Convert all the nans to a number, so that `dilate` can work with it
-        matrix = matrix.copy().astype(np.float32).squeeze()
+        # `astype` already makes a copy, so the input is left intact
+        matrix = matrix.astype(np.float32).squeeze()
         matrix[np.isnan(matrix)] = self.FILL_VALUE
 
         # Apply dilations along both axis
@@ -162,15 +178,32 @@ class AttributesMixin:
 
     @staticmethod
     def pca_transform(data, n_components=3, **kwargs):
-        """ Reduce number of channels along the depth axis. """
+        """ Reduce number of channels along the depth axis.
+        As there are a lot of traces and few components, randomized SVD solver is used by default for an integer
+        `n_components`: for a fraction of explained variance, `sklearn` picks the solver by itself.
+        """
         flattened = data.reshape(-1, data.shape[-1])
         mask = np.isnan(flattened).any(axis=-1)
-
+        dense = not mask.any()
+
+        # Boolean indexing makes a contiguous copy: cast it in-place to avoid one more copy inside of PCA
+        # Dense data is used without indexing at all: PCA copies it only if it is a view of the input
+        valid = flattened if dense else flattened[~mask]
+        valid = valid.astype(np.float32, copy=False)
+        if len(valid) <= n_components:
+            n_components = n_components if isinstance(n_components, int) else 1
+            return np.full((*data.shape[:2], n_components), np.nan, dtype=np.float32)
+
+        defaults = {'svd_solver': 'randomized', 'random_state': 0} if isinstance(n_components, int) else {}
+        kwargs = {**defaults, 'copy': np.may_share_memory(valid, data), **kwargs}
         pca = PCA(n_components, **kwargs)
-        transformed = pca.fit_transform(flattened[~mask])
+        transformed = pca.fit_transform(valid)
         n_components = transformed.shape[-1]
 
-        result = np.full((*data.shape[:2], n_components), np.nan).reshape(-1, n_components)
+        if dense:
+            return transformed.reshape(*data.shape[:2], n_components)
+
+        result = np.full((*data.shape[:2], n_components), np.nan, dtype=transformed.dtype).reshape(-1, n_components)
         result[~mask] = transformed
         result = result.reshape(*data.shape[:2], n_components)
         return result
@@ -185,13 +218,19 @@ class AttributesMixin:
     @cached_property
     def binary_matrix(self):
         """ Boolean matrix with `True` values at places where horizon is present and `False` everywhere else. """
-        return (self.matrix != self.FILL_VALUE).astype(np.bool)
+        return self.matrix != self.FILL_VALUE
 
     @cached_property
     def full_binary_matrix(self):
         """ A method for getting binary matrix in cubic coordinates. Allows for introspectable cache. """
         return self.matrix_put_on_full(self.binary_matrix)
 
+    @cached_property
+    def dead_traces_matrix(self):
+        """ Boolean matrix of field dead traces, cropped to the horizon bbox. Allows for introspectable cache. """
+        return self.field.dead_traces_matrix[self.i_min:self.i_max + 1,
+                                             self.x_min:self.x_max + 1].astype(np.bool_, copy=False)
+
     @property
     def mask(self):
         """ An alias. """
@@ -205,17 +244,18 @@ class AttributesMixin:
         coverage = len(self) / self.field.n_alive_traces
         return round(coverage, 5)
 
-    @property
+    @cached_property
     def number_of_holes(self):
         """ Number of holes inside horizon borders. """
-        holes_array = self.filled_matrix != self.binary_matrix
-        _, num = label(holes_array, connectivity=2, return_num=True, background=0)
+        # Filled matrix is a superset of the binary one
+        holes_array = self.filled_matrix & ~self.binary_matrix
+        _, num = label(holes_array, structure=np.ones((3, 3), dtype=np.bool_))
         return num
 
-    @property
+    @cached_property
     def perimeter(self):
         """ Number of points in the borders. """
-        return np.sum((self.borders_matrix == 1).astype(np.int32))
+        return np.count_nonzero(self.borders_matrix)
 
     @property
     def solidity(self):
@@ -228,35 +268,40 @@ class AttributesMixin:
         return self.d_max - self.d_min
 
     # Matrices computed from depth map
-    @property
+    @cached_property
     def borders_matrix(self):
         """ Borders of horizons (borders of holes inside are not included). """
         filled_matrix = self.filled_matrix
-        structure = np.ones((3, 3))
-        eroded = binary_erosion(filled_matrix, structure, border_value=0)
+        eroded = _erode_square(filled_matrix)
         return filled_matrix ^ eroded # binary difference operation
 
-    @property
+    @cached_property
     def boundaries_matrix(self):
         """ Borders of horizons (borders of holes inside included). """
         binary_matrix = self.binary_matrix
-        structure = np.ones((3, 3))
-        eroded = binary_erosion(binary_matrix, structure, border_value=0)
+        eroded = _erode_square(binary_matrix)
         return binary_matrix ^ eroded # binary difference operation
 
-    @property
+    @cached_property
     def filled_matrix(self):
         """ Binary matrix with filled holes. """
-        structure = np.ones((3, 3))
-        filled_matrix = binary_fill_holes(self.binary_matrix, structure)
+        # Background flood-fill with 8-connectivity matches `binary_fill_holes` with `np.ones((3, 3))` structure
+        filled_matrix = fill_holes(self.binary_matrix, connectivity=8)
         return filled_matrix
 
 
     def grad_along_axis(self, axis=0):
         """ Change of depths along specified direction. """
-        grad = np.diff(self.matrix, axis=axis, prepend=self.FILL_VALUE)
-        grad[np.abs(grad) > self.d_min] = self.FILL_VALUE
-        grad[self.matrix == self.FILL_VALUE] = self.FILL_VALUE
+        # Typed scalars keep the result in the matrix dtype instead of upcasting it to int64 / float64
+        dtype = self.matrix.dtype
+        fill_value = dtype.type(self.FILL_VALUE)
+        grad = np.diff(self.matrix, axis=axis, prepend=fill_value)
+        # Both masks are fused with the replacement into one in-place pass
+        numexpr.evaluate('where((matrix == fill_value) | (grad > threshold) | (grad < -threshold), '
+                         'fill_value, grad)',
+                         local_dict={'matrix': self.matrix, 'grad': grad,
+                                     'fill_value': fill_value, 'threshold': dtype.type(self.d_min)},
+                         out=grad)
         return grad
 
     @property
@@ -279,14 +324,21 @@ class AttributesMixin:
     @property
     def carcass_ilines(self):
         """ Labeled inlines in a carcass. """
-        uniques, counts = np.unique(self.points[:, 0], return_counts=True)
-        return uniques[counts > 256]
+        return self._labeled_lines(axis=0)
 
     @property
     def carcass_xlines(self):
         """ Labeled xlines in a carcass. """
-        uniques, counts = np.unique(self.points[:, 1], return_counts=True)
-        return uniques[counts > 256]
+        return self._labeled_lines(axis=1)
+
+    def _labeled_lines(self, axis, threshold=256):
+        """ Coordinates along `axis` with more than `threshold` points. Counted in linear time with `bincount`. """
+        coordinates = self.points[:, axis].astype(np.intp)
+        if coordinates.size == 0:
+            return coordinates
+        min_ = coordinates.min()
+        counts = np.bincount(coordinates - min_)
+        return np.nonzero(counts > threshold)[0] + min_
 
     @property
     def probabilities(self):
@@ -332,6 +384,8 @@ class AttributesMixin:
                         slice(d_start - low, min(d_end + high, self.field.depth)))
             location, _ = geometry.process_key(location)
             data_chunk = geometry.load_crop(location, use_cache=False)
+            # Crops from other projections are transposed views: make depth the contiguous axis for the gather
+            data_chunk = np.ascontiguousarray(data_chunk)
 
             # Check which points of the horizon are in the current chunk (and present)
             idx_i, idx_x = np.asarray((self.matrix != self.FILL_VALUE) &
@@ -344,14 +398,8 @@ class AttributesMixin:
             idx_x += self.x_min
             depths -= d_start
 
-            # Subsequently add values from the cube to background, then shift horizon 1 unit lower
-            for j in range(window):
-                background[idx_i, idx_x, np.full_like(depths, j)] = data_chunk[idx_i, idx_x, depths]
-                depths += 1
-                mask = depths < data_chunk.shape[2]
-                idx_i = idx_i[mask]
-                idx_x = idx_x[mask]
-                depths = depths[mask]
+            # Copy the whole window of cube values below each horizon point to background
+            _gather_along_depths(data_chunk, idx_i, idx_x, depths, background)
 
         background[~self.full_binary_matrix] = np.nan
         return background
@@ -403,17 +451,14 @@ class AttributesMixin:
         overlap_matrix[slc_array] = self.matrix[slc_horizon]
         overlap_matrix -= shifts[-1]
 
-        # make the cut-array and fill it with array-data located on needed depths
-        result = np.full(array.shape[:2] + (width, ), np.nan, dtype=np.float32)
-        iterator = [overlap_matrix + shift for shift in range(-width // 2 + 1, width // 2 + 1)]
-
-        for i, surface_level in enumerate(np.array(iterator)):
-            mask = (surface_level >= 0) & (surface_level < array.shape[-1]) & (surface_level !=
-                                                                               self.FILL_VALUE - shifts[-1])
-            mask_where = np.where(mask)
-            result[mask_where[0], mask_where[1], i] = array[mask_where[0], mask_where[1],
-                                                            surface_level[mask_where].astype(np.int)]
+        # make the cut-array and fill it with array-data located on needed depths: all of the levels at once
+        surface_levels = overlap_matrix[..., np.newaxis] + np.arange(-width // 2 + 1, width // 2 + 1)
+        mask = ((surface_levels >= 0) & (surface_levels < array.shape[-1]) &
+                (surface_levels != self.FILL_VALUE - shifts[-1]))
+        indices = np.where(mask, surface_levels, 0).astype(np.intp)
 
+        values = np.take_along_axis(array, indices, axis=-1)
+        result = np.where(mask, values, np.nan).astype(np.float32)
         return result
 
 
@@ -505,8 +550,7 @@ class AttributesMixin:
         enlarge = enlarge and self.is_carcass
 
         if src_name in self.ATTRIBUTE_TO_METHOD:
-            method = self.ATTRIBUTE_TO_METHOD[src_name]
-            data = getattr(self, method)(use_cache=use_cache, enlarge=enlarge, **kwargs)
+            data = self._load_full_attribute(src_name, use_cache=use_cache, enlarge=enlarge, **kwargs)
         else:
             data = self.get_property(src_name, enlarge=enlarge, **kwargs)
 
@@ -518,6 +562,16 @@ class AttributesMixin:
         return data
 
 
+    @lru_cache(maxsize=8, apply_by_default=False, copy_on_return=True)
+    def _load_full_attribute(self, src_name, enlarge=False, use_cache=False, **kwargs):
+        """ Load the whole attribute, evaluated by one of `get_*` methods, by its resolved name.
+        Cached with a bigger size than `get_*` methods, so that multiple layers of one plot don't evict each other.
+        The `use_cache` flag is passed further, so that intermediate results, shared between methods, are cached too.
+        """
+        method = self.ATTRIBUTE_TO_METHOD[src_name]
+        return getattr(self, method)(use_cache=use_cache, enlarge=enlarge, **kwargs)
+
+
     # Specific attributes loading
     @lru_cache(maxsize=1, apply_by_default=False, copy_on_return=True)
     @transformable
@@ -531,7 +585,7 @@ class AttributesMixin:
 
     @lru_cache(maxsize=1, apply_by_default=False, copy_on_return=True)
     @transformable
-    def get_instantaneous_amplitudes(self, window=11, offset=0, **kwargs):
+    def get_instantaneous_amplitudes(self, window=11, offset=0, use_cache=False, **kwargs):
         """ Calculate instantaneous amplitude along the horizon.
 
         Parameters
@@ -540,6 +594,8 @@ class AttributesMixin:
             Width of cube values cutout along horizon to use for attribute calculation.
         offset : int
             Constant shift of cube values cutout up or down from the horizon surface.
+        use_cache : bool
+            Whether to cache the result. Also used for the shared analytic signal.
         kwargs :
             Passed directly to :meth:`.get_cube_values`.
 
@@ -548,13 +604,13 @@ class AttributesMixin:
         Since Hilbert transform produces artifacts at signal start and end, if one's intenston is to use `n` channels
         of the resulting array, the `window` parameter value should better be somewhat bigger than the value of `n`.
         """
-        amplitudes = self.get_cube_values(window=window, offset=offset, use_cache=False, **kwargs)
-        result = np.abs(hilbert(amplitudes)).astype(np.float32)
+        analytic_signal = self.get_analytic_signal(window=window, offset=offset, use_cache=use_cache, **kwargs)
+        result = np.abs(analytic_signal).astype(np.float32)
         return result
 
     @lru_cache(maxsize=1, apply_by_default=False, copy_on_return=True)
     @transformable
-    def get_instantaneous_phases(self, window=11, offset=0, **kwargs):
+    def get_instantaneous_phases(self, window=11, offset=0, use_cache=False, **kwargs):
         """ Calculate instantaneous phase along the horizon.
 
         Parameters
@@ -563,6 +619,8 @@ class AttributesMixin:
             Width of cube values cutout along horizon to use for attribute calculation.
         offset : int
             Constant shift of cube values cutout up or down from the horizon surface.
+        use_cache : bool
+            Whether to cache the result. Also used for the shared analytic signal.
         kwargs :
             Passed directly to :meth:`.get_cube_values`.
 
@@ -572,10 +630,28 @@ class AttributesMixin:
         Since Hilbert transform produces artifacts at signal start and end, if one's intenston is to use `n` channels
         of the resulting array, the `window` parameter value should better be somewhat bigger than the value of `n`.
         """
-        amplitudes = self.get_cube_values(window=window, offset=offset, use_cache=False, **kwargs)
-        result = np.angle(hilbert(amplitudes)).astype(np.float32)
+        analytic_signal = self.get_analytic_signal(window=window, offset=offset, use_cache=use_cache, **kwargs)
+        result = np.angle(analytic_signal).astype(np.float32)
         return result
 
+    @lru_cache(maxsize=1, apply_by_default=False, copy_on_return=False)
+    def get_analytic_signal(self, window=11, offset=0, **kwargs):
+        """ Compute analytic signal of cube values along the horizon.
+        Shared by instantaneous amplitudes and phases, so that requesting both of them does only one transform.
+        Cached value is not copied on return: callers must not modify it inplace.
+
+        Parameters
+        ----------
+        window : int
+            Width of cube values cutout along horizon to use for attribute calculation.
+        offset : int
+            Constant shift of cube values cutout up or down from the horizon surface.
+        kwargs :
+            Passed directly to :meth:`.get_cube_values`.
+        """
+        amplitudes = self.get_cube_values(window=window, offset=offset, use_cache=False, **kwargs)
+        return hilbert(amplitudes)
+
     @lru_cache(maxsize=1, apply_by_default=False, copy_on_return=True)
     @transformable
     def get_metric(self, metric='support_corrs', supports=50, agg='nanmean', **kwargs):
@@ -604,7 +680,8 @@ class AttributesMixin:
             Width of amplitudes slice to calculate fourier transform on.
         """
         amplitudes = self.load_attribute('amplitudes', window=window)
-        result = np.abs(np.fft.rfft(amplitudes))
+        # Loaded amplitudes are a copy, so the transform is allowed to consume them
+        result = np.abs(rfft(amplitudes, axis=-1, workers=-1, overwrite_x=True))
         return result
 
     @lru_cache(maxsize=1, apply_by_default=False, copy_on_return=True)
@@ -620,12 +697,7 @@ class AttributesMixin:
             Width of amplitudes slice to calculate wavelet transform on.
         """
         amplitudes = self.load_attribute('amplitudes', window=window)
-        result_shape = *amplitudes.shape[:2], len(widths)
-        result = np.empty(result_shape, dtype=np.float32)
-        for idx, width in enumerate(widths):
-            wavelet = ricker(window, width).reshape(1, 1, -1)
-            result[:, :, idx] = convolve(amplitudes, wavelet, mode='constant')[:, :, window // 2]
-
+        result = amplitudes @ _make_wavelet_weights(window, tuple(widths))
         return result
 
 
@@ -822,6 +894,84 @@ class AttributesMixin:
         return spikes
 
 # Helper functions
+EROSION_STRUCTURE = np.ones((3, 3), dtype=np.uint8)
+
+@lru_cache_functools(maxsize=32)
+def _make_wavelet_weights(window, widths):
+    """ Matrix of shape (window, len(widths)) to compute central slices of convolutions with Ricker wavelets.
+    Only the central slice of each convolution is used, so it is a dot product along the depth axis:
+    weights are obtained as responses of the convolution at the central point to unit impulses.
+    """
+    impulses = np.eye(window, dtype=np.float32)
+    weights = np.empty((window, len(widths)), dtype=np.float32)
+    for idx, width in enumerate(widths):
+        wavelet = ricker(window, width)
+        weights[:, idx] = convolve1d(impulses, wavelet, axis=-1, mode='constant')[:, window // 2]
+    weights.flags.writeable = False
+    return weights
+
+def _erode_square(matrix):
+    """ Binary erosion with 3x3 square structure and zero border value, done with `cv2`. """
+    eroded = erode(matrix.astype(np.uint8), EROSION_STRUCTURE, borderType=BORDER_CONSTANT, borderValue=0)
+    return eroded.astype(np.bool_)
+
+@njit(parallel=True)
+def _gather_along_depths(data_chunk, idx_i, idx_x, depths, background):
+    """ Jit-accelerated function to copy `window` values from `data_chunk` to `background`, starting at `depths`.
+    Values below the `data_chunk` are skipped.
+    """
+    window = background.shape[2]
+    chunk_depth = data_chunk.shape[2]
+
+    for p in prange(len(idx_i)): #pylint: disable=not-an-iterable
+        i, x, depth = idx_i[p], idx_x[p], depths[p]
+        for j in range(min(window, chunk_depth - depth)):
+            background[i, x, j] = data_chunk[i, x, depth + j]
+
+@njit(parallel=True)
+def _masked_nan_stats(matrix, mask):
+    """ Jit-accelerated function to compute min, max, mean and std of non-nan `matrix` values at `mask` points.
+    Each line is reduced with Welford algorithm, then partial results are merged.
+    """
+    #pylint: disable=not-an-iterable
+    n_lines = matrix.shape[0]
+    mins = np.full(n_lines, np.inf)
+    maxs = np.full(n_lines, -np.inf)
+    counts = np.zeros(n_lines)
+    means = np.zeros(n_lines)
+    m2s = np.zeros(n_lines)
+
+    for i in prange(n_lines):
+        for j in range(matrix.shape[1]):
+            if not mask[i, j]:
+                continue
+
+            for k in range(matrix.shape[2]):
+                value = np.float64(matrix[i, j, k])
+                if isnan(value):
+                    continue
+
+                mins[i] = min(mins[i], value)
+                maxs[i] = max(maxs[i], value)
+                counts[i] += 1
+                delta = value - means[i]
+                means[i] += delta / counts[i]
+                m2s[i] += delta * (value - means[i])
+
+    count, mean, m2 = 0., 0., 0.
+    for i in range(n_lines):
+        if counts[i] == 0:
+            continue
+        total = count + counts[i]
+        delta = means[i] - mean
+        mean += delta * counts[i] / total
+        m2 += m2s[i] + delta ** 2 * count * counts[i] / total
+        count = total
+
+    if count == 0:
+        return np.nan, np.nan, np.nan, np.nan
+    return mins.min(), maxs.max(), mean, np.sqrt(m2 / count)
+
 @njit(parallel=True)
 def _get_spikes_along_line(matrix, max_spike_width=5, min_spike_size=3, max_depths_distance=2):
     """ Find spikes on a matrix for the fixed search direction: from up to down, from left to right.
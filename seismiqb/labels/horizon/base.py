@@ -4,6 +4,8 @@ from copy import copy
 from textwrap import dedent
 
 import numpy as np
+from numba import njit, prange
+from numba.typed import List
 
 from cc3d import connected_components
 from scipy.ndimage import find_objects
@@ -157,10 +159,11 @@ class Horizon(AttributesMixin, CacheMixin, CharismaMixin, ExtractionMixin, Proce
     @staticmethod
     def matrix_to_points(matrix):
         """ Convert depth-map matrix to points array. """
-        idx = np.nonzero(matrix != Horizon.FILL_VALUE)
-        points = np.hstack([idx[0].reshape(-1, 1),
-                            idx[1].reshape(-1, 1),
-                            matrix[idx[0], idx[1]].reshape(-1, 1)])
+        # Search for present points in the raveled matrix: 1D boolean `nonzero` is faster than 2D one
+        raveled = matrix.ravel()
+        idx = np.flatnonzero(raveled != Horizon.FILL_VALUE)
+        idx_i, idx_x = np.divmod(idx, matrix.shape[1])
+        points = np.stack([idx_i, idx_x, raveled[idx]], axis=1)
         return points
 
 
@@ -194,7 +197,8 @@ class Horizon(AttributesMixin, CacheMixin, CharismaMixin, ExtractionMixin, Proce
         """ Array of depth only. Useful for faster stats computation when initialized from a matrix. """
         if self._depths is None:
             if self._points is not None:
-                self._depths = self.points[:, -1]
+                # Contiguous copy of the column: all of the depth stats are computed from it
+                self._depths = np.ascontiguousarray(self.points[:, -1])
             else:
                 self._depths = self.matrix[self.matrix != self.FILL_VALUE]
         return self._depths
@@ -222,10 +226,10 @@ class Horizon(AttributesMixin, CacheMixin, CharismaMixin, ExtractionMixin, Proce
         if storage == 'matrix':
             self._depth = None
             self._matrix = None
+            self._bbox = None
 
             if len(self.points) > 0:
-                i_min, x_min, d_min = np.min(self.points, axis=0)
-                i_max, x_max, d_max = np.max(self.points, axis=0)
+                (i_min, x_min, d_min), (i_max, x_max, d_max) = _points_min_max(self.points)
 
                 self._d_min, self._d_max = d_min.astype(self.dtype), d_max.astype(self.dtype)
                 self.i_min, self.i_max, self.x_min, self.x_max = int(i_min), int(i_max), int(x_min), int(x_max)
@@ -259,12 +263,13 @@ class Horizon(AttributesMixin, CacheMixin, CharismaMixin, ExtractionMixin, Proce
         if not isinstance(other, type(self)):
             raise TypeError(f"Operands types do not match. Got {type(self)} and {type(other)}.")
 
+        # `full_matrix` is created anew at each access, so we can change it inplace
         presence = other.full_binary_matrix
-        discrepancies = self.full_matrix[presence] != other.full_matrix[presence]
+        res_matrix = self.full_matrix
+        discrepancies = res_matrix[presence] != other.full_matrix[presence]
         if discrepancies.any():
             raise ValueError("Horizons have different depths where present.")
 
-        res_matrix = self.full_matrix.copy()
         res_matrix[presence] = self.FILL_VALUE
         name = f"~{other.name}"
         result = type(self)(storage=res_matrix, field=self.field, name=name)
@@ -332,9 +337,9 @@ class Horizon(AttributesMixin, CacheMixin, CharismaMixin, ExtractionMixin, Proce
             mask = make_interior_points_mask(points, self.field.shape)
             points = points[mask]
 
-        if self.dtype == np.int32:
-            points = np.rint(points)
-        if points.dtype != self.dtype:
+        if self.dtype == np.int32 and np.issubdtype(points.dtype, np.floating):
+            points = _rint_to_int32(points)
+        elif points.dtype != self.dtype:
             points = points.astype(self.dtype)
         setattr(self, dst, points)
 
@@ -503,8 +508,11 @@ class Horizon(AttributesMixin, CacheMixin, CharismaMixin, ExtractionMixin, Proce
         -------
         New `Horizon` instance with filtered points matrix.
         """
-        result = copy(self)
+        # Shallow copy of attributes: `filter` replaces storages instead of changing them inplace
+        result = object.__new__(type(self))
+        result.__dict__ = self.__dict__.copy()
         result.name = name or self.name
+        result.path, result.format, result.already_merged = None, 'matrix', None
 
         filtering_matrix = (matrix < 0.5).astype(int)
         result.filter(filtering_matrix, inplace=True)
@@ -549,10 +557,9 @@ class Horizon(AttributesMixin, CacheMixin, CharismaMixin, ExtractionMixin, Proce
         low = width // 2
         high = max(width - low, 0)
 
-        mask_bbox = np.array([[slc.start, slc.stop] for slc in locations], dtype=np.int32)
-
         # Getting coordinates of overlap in cubic system
-        (mask_i_min, mask_i_max), (mask_x_min, mask_x_max), (mask_d_min, mask_d_max) = mask_bbox
+        (mask_i_min, mask_i_max), (mask_x_min, mask_x_max), (mask_d_min, mask_d_max) = [(slc.start, slc.stop)
+                                                                                        for slc in locations]
 
         #TODO: add clear explanation about usage of advanced index in Horizon
         i_min, i_max = max(self.i_min, mask_i_min), min(self.i_max + 1, mask_i_max)
@@ -562,29 +569,20 @@ class Horizon(AttributesMixin, CacheMixin, CharismaMixin, ExtractionMixin, Proce
             overlap = self.matrix[i_min - self.i_min : i_max - self.i_min,
                                   x_min - self.x_min : x_max - self.x_min]
 
-            # Coordinates of points to use in overlap local system
-            idx_i, idx_x = np.nonzero((overlap != self.FILL_VALUE) &
-                                      (overlap >= mask_d_min + low) &
-                                      (overlap <= mask_d_max - high))
-            depths = overlap[idx_i, idx_x]
-
-            # Convert coordinates to mask local system
-            idx_i += i_min - mask_i_min
-            idx_x += x_min - mask_x_min
-            depths -= (mask_d_min + low)
-
-            for shift in range(width):
-                mask[idx_i, idx_x, depths + shift] = alpha
+            # Select suitable points and put them into mask local system in one pass
+            _insert_matrix_into_mask(mask=mask, overlap=overlap,
+                                     i_shift=i_min - mask_i_min, x_shift=x_min - mask_x_min,
+                                     d_min=mask_d_min + low, d_max=mask_d_max - high,
+                                     width=width, alpha=mask.dtype.type(alpha), fill_value=self.FILL_VALUE)
 
         return mask
 
 
     def add_to_regression_mask(self, mask, locations, scale=False):
         """ Add depth matrix at `locations` to `mask`. """
-        mask_bbox = np.array([[slc.start, slc.stop] for slc in locations], dtype=np.int32)
-
         # Getting coordinates of overlap in cubic system
-        (mask_i_min, mask_i_max), (mask_x_min, mask_x_max), (mask_d_min, mask_d_max) = mask_bbox
+        (mask_i_min, mask_i_max), (mask_x_min, mask_x_max), (mask_d_min, mask_d_max) = [(slc.start, slc.stop)
+                                                                                        for slc in locations]
 
         i_min, i_max = max(self.i_min, mask_i_min), min(self.i_max + 1, mask_i_max)
         x_min, x_max = max(self.x_min, mask_x_min), min(self.x_max + 1, mask_x_max)
@@ -649,56 +647,97 @@ class Horizon(AttributesMixin, CacheMixin, CharismaMixin, ExtractionMixin, Proce
         return None
 
 
-    def check_proximity(self, other):
+    def check_proximity(self, other, stats_only=False):
         """ Compute a number of stats of location of `self` relative to the `other` Horizons.
 
         Parameters
         ----------
         self, other : Horizon
             Horizons to compare.
+        stats_only : bool
+            Whether to compute only scalar stats. If True, `difference_matrix` is not created and set to None.
 
         Returns
         -------
         dictionary with following keys:
-            - `difference_matrix` with matrix of depth differences
+            - `difference_matrix` with matrix of depth differences, if `stats_only` is False
             - `difference_mean` for average distance
             - `difference_abs_mean` for average of absolute values of point-wise distances
             - `difference_max`, `difference_abs_max`, `difference_std`, `difference_abs_std`
             - `overlap_size` with number of overlapping points
             - `window_rate` for percentage of traces that are in 5ms from one horizon to the other
         """
-        # Compute diffs
-        difference = np.where((self.full_matrix != self.FILL_VALUE) & (other.full_matrix != self.FILL_VALUE),
-                              self.full_matrix - other.full_matrix, np.nan)
-
-        mask = ~np.isnan(difference)
-        overlap_size = np.sum(mask)
-        masked_difference = difference[mask]
-        masked_abs_difference = np.abs(masked_difference)
-        window_rate = np.sum(masked_abs_difference < (5 / self.field.sample_rate)) / overlap_size
+        return self.check_proximity_many([other], stats_only=stats_only)[0]
 
-        present_at_1_absent_at_2 = ((self.full_matrix != self.FILL_VALUE)
-                                    & (other.full_matrix == self.FILL_VALUE)).sum()
-        present_at_2_absent_at_1 = ((self.full_matrix == self.FILL_VALUE)
-                                    & (other.full_matrix != self.FILL_VALUE)).sum()
+    def check_proximity_many(self, others, stats_only=False):
+        """ Compute stats of location of `self` relative to each of `others`, as in :meth:`check_proximity`.
+        All of the comparisons are made in one pass over the depth map of `self`.
 
-        if masked_difference.size == 0:
-            masked_difference = masked_abs_difference = np.array([np.nan], dtype=np.float32)
+        Returns
+        -------
+        list of dictionaries, one for each of `others`. Empty, if there are no `others`.
+        """
+        if len(others) == 0:
+            return []
+
+        # Matrices are passed to the kernel in a typed list, so they must have the same dtype
+        dtype = np.result_type(*[other.matrix.dtype for other in others])
+        matrices = List([np.ascontiguousarray(other.matrix, dtype=dtype) for other in others])
+        others_i_min = np.array([other.i_min for other in others], dtype=np.int64)
+        others_x_min = np.array([other.x_min for other in others], dtype=np.int64)
+
+        # Compute diffs and all of the stats in one pass over the depth map of `self`
+        if stats_only:
+            differences = np.empty((0, 0, 0), dtype=np.float32)
+        else:
+            differences = np.full((len(others), *self.field.spatial_shape), np.nan, dtype=np.float32)
+        row_stats = _proximity_row_stats(self.matrix, self.i_min, self.x_min, matrices, others_i_min, others_x_min,
+                                         fill_value=self.FILL_VALUE, threshold=5 / self.field.sample_rate,
+                                         differences=differences)
+
+        differences = [None] * len(others) if stats_only else differences
+        return [self._make_proximity_info(other_row_stats, other=other, difference=difference)
+                for other_row_stats, other, difference in zip(row_stats, others, differences)]
+
+    def _make_proximity_info(self, row_stats, other, difference):
+        """ Aggregate per-row stats, computed by :func:`_proximity_row_stats`, into proximity info. """
+        counts = row_stats[:, 0]
+        (overlap_size, present_at_1_absent_at_2, n_equal_0, n_within_1,
+         n_within_2, n_within_window) = row_stats[:, [0, 1, 8, 9, 10, 11]].sum(axis=0)
+        overlap_size, present_at_1_absent_at_2 = int(overlap_size), int(present_at_1_absent_at_2)
+        present_at_2_absent_at_1 = len(other) - overlap_size
+
+        if overlap_size > 0:
+            min_, max_ = row_stats[:, 6].min(), row_stats[:, 7].max()
+
+            # Per-row means and squared deviations are merged with Chan formula
+            row_means, row_abs_means = row_stats[:, 2], row_stats[:, 4]
+            mean = (counts * row_means).sum() / overlap_size
+            abs_mean = (counts * row_abs_means).sum() / overlap_size
+            m2 = row_stats[:, 3].sum() + (counts * (row_means - mean) ** 2).sum()
+            abs_m2 = row_stats[:, 5].sum() + (counts * (row_abs_means - abs_mean) ** 2).sum()
+            std, abs_std = np.sqrt(m2 / overlap_size), np.sqrt(abs_m2 / overlap_size)
+
+            accuracies = n_equal_0 / overlap_size, n_within_1 / overlap_size, n_within_2 / overlap_size
+            window_rate = n_within_window / overlap_size
+        else:
+            min_ = max_ = mean = abs_mean = std = abs_std = window_rate = np.nan
+            accuracies = 0., 0., 0.
 
         info_dict = {
             'difference_matrix' : difference,
-            'difference_mean' : np.mean(masked_difference),
-            'difference_max' : np.max(masked_difference),
-            'difference_min' : np.min(masked_difference),
-            'difference_std' : np.std(masked_difference),
+            'difference_mean' : mean,
+            'difference_max' : max_,
+            'difference_min' : min_,
+            'difference_std' : std,
 
-            'abs_difference_mean' : np.mean(masked_abs_difference),
-            'abs_difference_max' : np.max(masked_abs_difference),
-            'abs_difference_std' : np.std(masked_abs_difference),
+            'abs_difference_mean' : abs_mean,
+            'abs_difference_max' : max(abs(min_), abs(max_)),
+            'abs_difference_std' : abs_std,
 
-            'accuracy@0': np.mean(masked_abs_difference == 0),
-            'accuracy@1': np.mean(masked_abs_difference <= 1),
-            'accuracy@2': np.mean(masked_abs_difference <= 2),
+            'accuracy@0': accuracies[0],
+            'accuracy@1': accuracies[1],
+            'accuracy@2': accuracies[2],
 
             'overlap_size': overlap_size,
             'overlap_coverage': overlap_size / self.field.n_alive_traces,
@@ -711,12 +750,17 @@ class Horizon(AttributesMixin, CacheMixin, CharismaMixin, ExtractionMixin, Proce
                      for key, value in info_dict.items()}
         return MetaDict(info_dict)
 
-    def find_closest(self, *others):
-        """ Find closest horizon to `self` in the list of `others`. """
-        proximities = [(other, self.check_proximity(other)) for other in others
-                       if other.field.name == self.field.name]
+    def find_closest(self, *others, stats_only=False):
+        """ Find closest horizon to `self` in the list of `others`.
+        Candidates are compared by scalar stats only; `difference_matrix` is computed for the closest one,
+        unless `stats_only` is True.
+        """
+        others = [other for other in others if other.field.name == self.field.name]
+        proximities = list(zip(others, self.check_proximity_many(others, stats_only=True)))
 
         closest, proximity_info = min(proximities, key=lambda item: item[1].get('abs_difference_mean', np.inf))
+        if not stats_only:
+            proximity_info = self.check_proximity(closest)
         return closest, proximity_info
 
     # Alias for horizon comparisons
@@ -742,7 +786,7 @@ class Horizon(AttributesMixin, CacheMixin, CharismaMixin, ExtractionMixin, Proce
         if threshold_missing == 0:
             return np.array_equal(self.points, other.points)
 
-        info = self.check_proximity(other)
+        info = self.check_proximity(other, stats_only=True)
         n_missing = max(info['present_at_1_absent_at_2'], info['present_at_2_absent_at_1'])
         return info['difference_mean'] == 0 and n_missing < threshold_missing
 
@@ -783,3 +827,116 @@ class Horizon(AttributesMixin, CacheMixin, CharismaMixin, ExtractionMixin, Proce
                                    max_depth_difference=max_depth_difference, inplace=False, dtype=np.float32)
 
         self.dump_charisma(data=smoothed.points, path=path, format='points', name=self.name, transform=transform)
+
+
+# Helper functions
+@njit
+def _rint_to_int32(points):
+    """ Round floating points to the nearest integers and store them as int32 in one pass. """
+    result = np.empty(points.shape, dtype=np.int32)
+    for i in range(points.shape[0]):
+        for j in range(points.shape[1]):
+            result[i, j] = np.int32(np.rint(points[i, j]))
+    return result
+
+@njit
+def _points_min_max(points):
+    """ Get both min and max values along each column in just one pass through array. """
+    min_values, max_values = points[0].copy(), points[0].copy()
+    for i in range(1, points.shape[0]):
+        for j in range(points.shape[1]):
+            min_values[j] = min(points[i, j], min_values[j])
+            max_values[j] = max(points[i, j], max_values[j])
+    return min_values, max_values
+
+@njit(parallel=True)
+def _insert_matrix_into_mask(mask, overlap, i_shift, x_shift, d_min, d_max, width, alpha, fill_value):
+    """ Put `alpha` into `width` consecutive mask depths, starting at each present depth of `overlap`.
+    Depths outside of [`d_min`, `d_max`] range are skipped, and `d_min` is used as the mask depth origin.
+    """
+    #pylint: disable=not-an-iterable
+    for i in prange(overlap.shape[0]):
+        for x in range(overlap.shape[1]):
+            depth = overlap[i, x]
+            if depth != fill_value and d_min <= depth <= d_max:
+                start = depth - d_min
+                trace = mask[i + i_shift, x + x_shift]
+
+                # Unrolled writes for the most common widths
+                if width == 1:
+                    trace[start] = alpha
+                elif width == 3:
+                    trace[start] = alpha
+                    trace[start + 1] = alpha
+                    trace[start + 2] = alpha
+                else:
+                    trace[start:start + width] = alpha
+
+@njit(parallel=True)
+def _proximity_row_stats(matrix, i_min, x_min, others, others_i_min, others_x_min, fill_value, threshold, differences):
+    """ Stats of depth differences between a depth map and each of `others`, computed in one pass over its rows.
+
+    For each of `others`, each row of the result contains: overlap size, number of points absent in `other`,
+    mean of differences and sum of their squared deviations from it, the same two values for absolute differences,
+    minimum and maximum differences,
+    numbers of absolute differences equal to zero, not bigger than one and two, and smaller than `threshold`.
+    Means and squared deviations are accumulated with Welford algorithm to avoid the loss of precision.
+    Differences are also written into `differences` matrices, which are in cubic coordinates, if it is not empty.
+    """
+    #pylint: disable=not-an-iterable, too-many-nested-blocks
+    n_rows, n_cols = matrix.shape
+    n_others = len(others)
+    write_difference = differences.size > 0
+
+    stats = np.zeros((n_others, n_rows, 12), dtype=np.float64)
+    stats[:, :, 6] = np.inf
+    stats[:, :, 7] = -np.inf
+
+    for i in prange(n_rows):
+        for k in range(n_others):
+            other = others[k]
+            other_rows, other_cols = other.shape
+            other_i, other_x_min = i + i_min - others_i_min[k], others_x_min[k]
+
+            # Range of columns that overlap with `other`: outside of it we only count present points
+            x_start = min(max(other_x_min - x_min, 0), n_cols)
+            x_stop = max(min(other_x_min - x_min + other_cols, n_cols), x_start)
+            if not 0 <= other_i < other_rows:
+                x_start = x_stop = n_cols
+
+            n_absent = 0
+            for x in range(x_start):
+                n_absent += matrix[i, x] != fill_value
+            for x in range(x_stop, n_cols):
+                n_absent += matrix[i, x] != fill_value
+
+            row = stats[k, i]
+            for x in range(x_start, x_stop):
+                depth = matrix[i, x]
+                other_depth = other[other_i, x + x_min - other_x_min]
+                if depth == fill_value:
+                    continue
+                if other_depth == fill_value:
+                    n_absent += 1
+                    continue
+
+                diff = np.float64(depth) - np.float64(other_depth)
+                abs_diff = abs(diff)
+                if write_difference:
+                    differences[k, i + i_min, x + x_min] = diff
+
+                row[0] += 1
+                delta = diff - row[2]
+                row[2] += delta / row[0]
+                row[3] += delta * (diff - row[2])
+                delta = abs_diff - row[4]
+                row[4] += delta / row[0]
+                row[5] += delta * (abs_diff - row[4])
+                row[6] = min(row[6], diff)
+                row[7] = max(row[7], diff)
+                row[8] += abs_diff == 0
+                row[9] += abs_diff <= 1
+                row[10] += abs_diff <= 2
+                row[11] += abs_diff < threshold
+            row[1] = n_absent
+    return stats
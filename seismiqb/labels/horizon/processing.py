@@ -2,14 +2,22 @@
 from math import isnan
 from functools import partialmethod
 import numpy as np
+import numexpr
 from numba import njit, prange
 
-from cv2 import inpaint as cv2_inpaint
+from cv2 import inpaint as cv2_inpaint, dilate as cv2_dilate
 from skimage.measure import label
-from scipy.ndimage.morphology import binary_fill_holes, binary_dilation, binary_erosion
+from scipy.ndimage.morphology import binary_dilation, binary_erosion
 
 from ...functional import make_gaussian_kernel
-from ...utils import make_bezier_figure
+from ...utils import make_bezier_figure, fill_holes
+
+
+# Default structure of `scipy.ndimage` binary morphology: connectivity of one
+CROSS_STRUCTURE = np.array([[0, 1, 0],
+                            [1, 1, 1],
+                            [0, 1, 0]], dtype=np.uint8)
+
 
 class ProcessingMixin:
     """ Methods for horizon processing.
@@ -88,19 +96,14 @@ class ProcessingMixin:
             matrix = self.mask
 
         labeled = label(matrix)
-        values, counts = np.unique(labeled, return_counts=True)
-        counts = counts[values != 0]
-        values = values[values != 0]
-
-        object_id = values[np.argmax(counts)]
-
-        filtering_matrix = np.zeros_like(self.mask)
-        filtering_matrix[labeled == object_id] = 1
+        counts = np.bincount(labeled.ravel())
+        object_id = np.argmax(counts[1:]) + 1 # skip the background label
 
         if erosion_rate > 0:
-            filtering_matrix = binary_dilation(filtering_matrix, structure, iterations=erosion_rate)
-
-        filtering_matrix = filtering_matrix == 0
+            filtering_matrix = binary_dilation(labeled == object_id, structure, iterations=erosion_rate)
+            filtering_matrix = ~filtering_matrix
+        else:
+            filtering_matrix = labeled != object_id
 
         return self.filter(filtering_matrix, inplace=inplace)
 
@@ -178,8 +181,7 @@ class ProcessingMixin:
                                           **kwargs)
 
         result[(self.matrix == self.FILL_VALUE) | np.isnan(result)] = self.FILL_VALUE
-        result[self.field.dead_traces_matrix[self.i_min:self.i_max + 1,
-                                             self.x_min:self.x_max + 1]] = self.FILL_VALUE
+        result[self.dead_traces_matrix] = self.FILL_VALUE
 
         if dtype == np.int32 or (self.dtype == np.int32 and inplace is True):
             result = np.rint(result).astype(np.int32)
@@ -236,8 +238,7 @@ class ProcessingMixin:
                                   max_depth_ptp=max_depth_ptp)
 
         result[np.isnan(result)] = self.FILL_VALUE
-        result[self.field.dead_traces_matrix[self.i_min:self.i_max + 1,
-                                             self.x_min:self.x_max + 1]] = self.FILL_VALUE
+        result[self.dead_traces_matrix] = self.FILL_VALUE
 
         if self.dtype == np.int32:
             result = np.rint(result).astype(np.int32)
@@ -280,13 +281,12 @@ class ProcessingMixin:
             Processed horizon instance. A new instance if `inplace` is False, `self` otherwise.
         """
         image = self.matrix.astype(np.uint16) # dtype conversion for compatibility with the OpenCV method
-        dead_traces_matrix = self.field.dead_traces_matrix[self.i_min:self.i_max + 1,
-                                                           self.x_min:self.x_max + 1]
+        dead_traces_matrix = self.dead_traces_matrix
 
         # We use all empty traces as inpainting mask because it is important for correct boundary conditions
         # in differential equations, that are used in the inpainting method
         holes_mask = (self.matrix == self.FILL_VALUE).astype(np.uint8)
-        holes_mask[dead_traces_matrix == 1] = 1
+        holes_mask[dead_traces_matrix] = 1
 
         result = cv2_inpaint(src=image, inpaintMask=holes_mask, inpaintRadius=neighbors_radius, flags=method)
         result = result.astype(self.dtype)
@@ -297,7 +297,7 @@ class ProcessingMixin:
         # Filter traces with anomalies (can be caused by boundary conditions in equations on horizon borders)
         anomalies_mask = (result > self.d_max + 10) | (result < self.d_min - 10)
 
-        result[(too_far_traces_mask == 1) | (anomalies_mask == 1) | (dead_traces_matrix == 1)] = self.FILL_VALUE
+        result[(too_far_traces_mask == 1) | (anomalies_mask == 1) | dead_traces_matrix] = self.FILL_VALUE
 
         if inplace:
             self.matrix = result
@@ -331,11 +331,13 @@ class ProcessingMixin:
         if isinstance(factor, int):
             factor = (factor, factor)
 
-        uniques, counts = np.unique(self.points[:, 0], return_counts=True)
-        mask_i = np.isin(self.points[:, 0], uniques[counts > threshold][::factor[0]])
+        ilines, xlines = np.ascontiguousarray(self.points[:, :2].T)
+
+        uniques, counts = np.unique(ilines, return_counts=True)
+        mask_i = np.isin(ilines, uniques[counts > threshold][::factor[0]])
 
-        uniques, counts = np.unique(self.points[:, 1], return_counts=True)
-        mask_x = np.isin(self.points[:, 1], uniques[counts > threshold][::factor[1]])
+        uniques, counts = np.unique(xlines, return_counts=True)
+        mask_x = np.isin(xlines, uniques[counts > threshold][::factor[1]])
 
         points = self.points[mask_i + mask_x]
 
@@ -406,7 +408,7 @@ class ProcessingMixin:
             Seed the random numbers generator.
         """
         rng = np.random.default_rng(seed)
-        filtering_matrix = np.zeros_like(self.full_matrix)
+        filtering_matrix = np.zeros(self.field.spatial_shape, dtype=np.uint8)
 
         # Generate bezier-like holes
         # Generate figures scales
@@ -441,8 +443,8 @@ class ProcessingMixin:
             figure_coordinates += location
 
             # Shift figures if they are out of field bounds
-            negative_coords_shift = np.min(np.vstack([figure_coordinates, [0, 0]]), axis=0)
-            huge_coords_shift = np.max(np.vstack([figure_coordinates - self.shape, [0, 0]]), axis=0)
+            negative_coords_shift = np.minimum(figure_coordinates.min(axis=0), 0)
+            huge_coords_shift = np.maximum(figure_coordinates.max(axis=0) - self.shape, 0)
             figure_coordinates -= (huge_coords_shift + negative_coords_shift + 1)
 
             coordinates.append(figure_coordinates)
@@ -457,9 +459,12 @@ class ProcessingMixin:
 
             if isinstance(points_shape, int):
                 points_shape = (points_shape, points_shape)
-            filtering_matrix = binary_dilation(filtering_matrix, np.ones(points_shape))
+            # For even sizes, `binary_dilation` puts the structure center one pixel before the `cv2` default
+            height, width = points_shape
+            anchor = (width // 2 - (1 - width % 2), height // 2 - (1 - height % 2))
+            filtering_matrix = cv2_dilate(filtering_matrix, np.ones(points_shape, dtype=np.uint8), anchor=anchor)
 
-            coordinates.append(np.argwhere(filtering_matrix > 0))
+            coordinates.append(np.stack(np.nonzero(filtering_matrix), axis=1))
 
         coordinates = np.concatenate(coordinates)
 
@@ -468,21 +473,22 @@ class ProcessingMixin:
             noise = rng.normal(loc=coordinates,
                                scale=noise_level,
                                size=coordinates.shape)
-            coordinates = np.unique(np.vstack([coordinates, noise.astype(int)]), axis=0)
+            # No need to deduplicate: coordinates are scattered onto the filtering matrix, which acts as a bitmap
+            coordinates = np.vstack([coordinates, noise.astype(int)])
 
         # Add valid coordinates onto filtering matrix
-        idx = np.where((coordinates[:, 0] >= 0) &
-                       (coordinates[:, 1] >= 0) &
-                       (coordinates[:, 0] < self.i_length) &
-                       (coordinates[:, 1] < self.x_length))[0]
-        coordinates = coordinates[idx]
+        # All of the bounds checks are fused into one pass
+        mask = numexpr.evaluate('(idx_i >= 0) & (idx_x >= 0) & (idx_i < i_length) & (idx_x < x_length)',
+                                local_dict={'idx_i': coordinates[:, 0], 'idx_x': coordinates[:, 1],
+                                            'i_length': self.i_length, 'x_length': self.x_length})
+        coordinates = coordinates[mask]
 
         filtering_matrix[coordinates[:, 0], coordinates[:, 1]] = 1
 
         # Process holes
-        filtering_matrix = binary_fill_holes(filtering_matrix)
-        filtering_matrix = binary_dilation(filtering_matrix, iterations=4)
-        return filtering_matrix
+        filtering_matrix = fill_holes(filtering_matrix).astype(np.uint8)
+        filtering_matrix = cv2_dilate(filtering_matrix, CROSS_STRUCTURE, iterations=4)
+        return filtering_matrix.astype(np.bool_)
 
     def make_holes(self, inplace=False, n=10, scale=1.0, max_scale=.25,
                    max_angles_amount=4, max_sharpness=5.0, locations=None,
@@ -696,9 +696,12 @@ class HorizonMetrics(BaseMetrics):
 
         if visualize:
             # Prepare data
-            matrix = proximity_info['difference_matrix'].copy()
+            # Enlarging creates a new matrix, so the copy is needed only otherwise
+            matrix = proximity_info['difference_matrix']
             if enlarge and (self.horizon.is_carcass or other.is_carcass):
                 matrix = self.horizon.matrix_enlarge(matrix, width=width)
+            else:
+                matrix = matrix.copy()
 
             # Field boundaries
             bounds = self.horizon.field.dead_traces_matrix
@@ -750,8 +753,7 @@ class HorizonMetrics(BaseMetrics):
             graph_msg = graph_msg.replace('\n' + ' '*20, ', ').replace('\t', ' ')
             graph_msg = ' '.join(item for item in graph_msg.split('  ') if item).strip('\n')
 
-            matrix = proximity_info['difference_matrix'].copy()
-            hist_data = np.clip(matrix, -clip_value, clip_value)
+            hist_data = np.clip(proximity_info['difference_matrix'], -clip_value, clip_value)
 
             if ignore_zeros:
                 zero_mask = hist_data == 0.0
@@ -31,9 +31,10 @@ METRIC_CMAP.set_bad(color='black')
 register_cmap(name='Metric', cmap=METRIC_CMAP)
 
 
-SAMPLER_CMAP = ListedColormap([ColorConverter().to_rgb('blue'),
-                                ColorConverter().to_rgb('red'),
-                                ColorConverter().to_rgb('purple')])
+COLOR_CONVERTER = ColorConverter()
+SAMPLER_CMAP = ListedColormap([COLOR_CONVERTER.to_rgb('blue'),
+                                COLOR_CONVERTER.to_rgb('red'),
+                                COLOR_CONVERTER.to_rgb('purple')])
 register_cmap(name='Sampler', cmap=SAMPLER_CMAP)
 
 
@@ -1,11 +1,10 @@
 """ 3D surface plotting. """
 import os
+from functools import lru_cache
 
 import cv2
 import numpy as np
 import matplotlib.pyplot as plt
-import plotly.figure_factory as ff
-import plotly.graph_objects as go
 
 from matplotlib.cm import get_cmap
 
@@ -56,11 +55,15 @@ def show_3d(x, y, z, simplices, title, zoom, colors=None, show_axes=True, aspect
     kwargs : dict
         Other arguments of plot creation.
     """
-    #pylint: disable=too-many-arguments
+    #pylint: disable=too-many-arguments, import-outside-toplevel
+    # Plotly is slow to import and is needed only here, so it is not loaded on `import seismiqb`
+    import plotly.figure_factory as ff
+    import plotly.graph_objects as go
+
     # Arguments of graph creation
     kwargs = {
         'title': title,
-        'colormap': [plt.get_cmap('Depths')(x) for x in np.linspace(0, 1, 10)],
+        'colormap': [tuple(color) for color in get_cmap('Depths')(np.linspace(0, 1, 10))],
         'edges_color': 'rgb(70, 40, 50)',
         'show_colorbar': False,
         'width': width,
@@ -69,12 +72,7 @@ def show_3d(x, y, z, simplices, title, zoom, colors=None, show_axes=True, aspect
         **kwargs
     }
     if isinstance(colorscale, str) and colorscale in plt.colormaps():
-        cmap = get_cmap(colorscale)
-        levels = np.arange(0, 256, 1) / 255
-        colorscale = [
-            (level, f'rgb({r * 255}, {g * 255}, {b * 255})')
-            for (r, g, b, _), level in zip(cmap(levels), levels)
-        ]
+        colorscale = _make_plotly_colorscale(colorscale)
 
     if simplices is not None:
         if colors is not None:
@@ -95,16 +93,19 @@ def show_3d(x, y, z, simplices, title, zoom, colors=None, show_axes=True, aspect
                 image[:, :bounds] = fill
                 image[:, -bounds:] = fill
 
+            # Coordinate grids are created directly in the image layout and in single precision
             grid = np.meshgrid(
-                np.linspace(0, shape[0], image.shape[0]),
-                np.linspace(0, shape[1], image.shape[1])
+                np.linspace(0, shape[0], image.shape[0], dtype=np.float32),
+                np.linspace(0, shape[1], image.shape[1], dtype=np.float32),
+                indexing='ij'
             )
+            plane = np.full(image.shape, loc, dtype=np.float32)
             if axis == 0:
-                x, y, z = loc * np.ones_like(image), grid[0].T + zoom[1].start, grid[1].T + zoom[2].start
+                x, y, z = plane, grid[0] + zoom[1].start, grid[1] + zoom[2].start
             elif axis == 1:
-                y, x, z = loc * np.ones_like(image), grid[0].T + zoom[0].start, grid[1].T + zoom[2].start
+                y, x, z = plane, grid[0] + zoom[0].start, grid[1] + zoom[2].start
             else:
-                z, x, y = loc * np.ones_like(image), grid[0].T + zoom[0].start, grid[1].T + zoom[1].start
+                z, x, y = plane, grid[0] + zoom[0].start, grid[1] + zoom[1].start
             fig.add_surface(x=x, y=y, z=z, surfacecolor=np.flipud(image),
                             showscale=False, colorscale=colorscale)
     # Update scene with title, labels and axes
@@ -141,3 +142,12 @@ def show_3d(x, y, z, simplices, title, zoom, colors=None, show_axes=True, aspect
             fig.write_html(savepath)
         elif ext in ['png', 'jpg', 'jpeg', 'pdf']:
             fig.write_image(savepath, format=ext)
+
+
+@lru_cache(maxsize=16)
+def _make_plotly_colorscale(cmap_name):
+    """ Convert matplotlib colormap to plotly colorscale. Cached, as the conversion does not depend on data. """
+    cmap = get_cmap(cmap_name)
+    levels = np.arange(0, 256, 1) / 255
+    return [(level, f'rgb({r * 255}, {g * 255}, {b * 255})')
+            for (r, g, b, _), level in zip(cmap(levels), levels)]
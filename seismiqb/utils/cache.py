@@ -3,7 +3,7 @@ import os
 from copy import copy
 from functools import wraps, cached_property
 from hashlib import blake2b
-from inspect import ismethod
+from inspect import ismethod, signature
 from threading import RLock
 from collections import OrderedDict, defaultdict
 
@@ -15,6 +15,7 @@ import pandas as pd
 class lru_cache:
     """ Thread-safe least recent used cache. Must be applied to a class methods.
     Adds the `use_cache` argument to the decorated method to control whether the caching logic is applied.
+    If the method declares `use_cache` itself, the resolved value is passed to it as well.
     Stored values are individual for each instance of a class.
 
     Parameters
@@ -101,6 +102,8 @@ class lru_cache:
 
     def __call__(self, func):
         """ Add the cache to the function. """
+        forward_use_cache = 'use_cache' in signature(func).parameters
+
         @wraps(func)
         def wrapper(*args, **kwargs):
             # if a bound method, get class instance from function else from arguments
@@ -114,11 +117,15 @@ class lru_cache:
 
             # Skip the caching logic and evaluate function directly
             if not use_cache:
+                if forward_use_cache:
+                    kwargs['use_cache'] = use_cache
                 result = func(*args, **kwargs)
                 return result
 
             key = self.make_key(instance, args, kwargs)
             instance_hash = self.compute_hash(instance)
+            if forward_use_cache:
+                kwargs['use_cache'] = use_cache
 
             # If result is already in cache, just retrieve it and update its timings
             with self.lock:
@@ -90,7 +90,8 @@ def transformable(method):
             result = instance.matrix_set_dtype(result, dtype=dtype)
 
         if on_full and hasattr(instance, 'matrix_put_on_full'):
-            result = instance.matrix_put_on_full(result)
+            # The result is already owned by the wrapper, so there is no need to copy cube-shaped matrices
+            result = instance.matrix_put_on_full(result, inplace=True)
 
         if channels is not None:
             if channels == 'middle':
@@ -1,6 +1,7 @@
 """ Utility functions. """
 import os
 
+import cv2
 import numpy as np
 from numba import njit, prange
 
@@ -121,7 +122,6 @@ def make_bezier_figure(n=7, radius=0.2, sharpness=0.05, scale=1.0, shape=(1, 1),
     angles = np.append(angles, angles[0])
 
     # Create figure part by part: make curves between each pair of points
-    curve_segments = []
     # Calculate control points for Bezier curve
     points_distances = np.sqrt(np.sum(diff_between_points ** 2, axis=1))
     radii = radius * points_distances
@@ -132,24 +132,37 @@ def make_bezier_figure(n=7, radius=0.2, sharpness=0.05, scale=1.0, shape=(1, 1),
     curve_main_points_arr = np.hstack([key_points[:-1], middle_control_points_1,
                                        middle_control_points_2, key_points[1:]]).reshape(n, 4, -1)
 
-    # Get Bernstein polynomial approximation of each curve
-    binom_coefficients = [1, 3, 3, 1]
-    for i in range(n):
-        bezier_param_t = np.linspace(0, 1, num=resolution)
-        current_segment = np.zeros((resolution, 2))
-        for point_num, point in enumerate(curve_main_points_arr[i]):
-            binom_coefficient = binom_coefficients[point_num]
-            polynomial_degree = np.power(bezier_param_t, point_num)
-            polynomial_degree *= np.power(1 - bezier_param_t, 3 - point_num)
-            bernstein_polynomial = binom_coefficient * polynomial_degree
-            current_segment += np.outer(bernstein_polynomial, point)
-        curve_segments.extend(current_segment)
-
-    curve_segments = np.array(curve_segments)
+    # Get Bernstein polynomial approximation of each curve: basis is the same for all of them
+    binom_coefficients = np.array([1, 3, 3, 1])
+    degrees = np.arange(4)
+    bezier_param_t = np.linspace(0, 1, num=resolution).reshape(-1, 1)
+    bernstein_polynomials = binom_coefficients * bezier_param_t ** degrees * (1 - bezier_param_t) ** (3 - degrees)
+
+    # Curves are computed for all the pairs of key points at once: (n, resolution, 2) array
+    curve_segments = np.einsum('rp,npc->nrc', bernstein_polynomials, curve_main_points_arr).reshape(-1, 2)
     figure_coordinates = np.unique(np.ceil(curve_segments).astype(int), axis=0)
     return figure_coordinates
 
 
+def fill_holes(matrix, connectivity=4):
+    """ Fill holes in a binary matrix. The same as `scipy.ndimage.binary_fill_holes`, but done in one pass:
+    the background is flood-filled from the outside of the matrix, and everything not reached by it is kept.
+
+    Parameters
+    ----------
+    matrix : np.ndarray
+        Binary 2D matrix.
+    connectivity : {4, 8}
+        Connectivity of the background: 4 corresponds to the default structure of `binary_fill_holes`,
+        8 corresponds to the `np.ones((3, 3))` structure.
+    """
+    # Pad with background so that the whole outer area is connected to the seed point
+    image = np.pad((matrix != 0).astype(np.uint8), 1)
+    flood_mask = np.zeros((image.shape[0] + 2, image.shape[1] + 2), dtype=np.uint8)
+    cv2.floodFill(image, flood_mask, seedPoint=(0, 0), newVal=2, flags=connectivity)
+    return image[1:-1, 1:-1] != 2
+
+
 def trinagular_kernel_1d(length, alpha=.1):
     """ Kernel-function that changes linearly from a center point to alpha on borders. """
     result = np.zeros(length)
@@ -233,13 +246,19 @@ def make_slices(slices, shape):
 
 def make_interior_points_mask(points, cube_shape):
     """ Create mask for points inside of the cube. """
-    mask = np.where((points[:, 0] >= 0) &
-                    (points[:, 1] >= 0) &
-                    (points[:, 2] >= 0) &
-                    (points[:, 0] < cube_shape[0]) &
-                    (points[:, 1] < cube_shape[1]) &
-                    (points[:, 2] < cube_shape[2]))[0]
-    return mask
+    return _interior_points_indices(points, cube_shape[0], cube_shape[1], cube_shape[2])
+
+@njit
+def _interior_points_indices(points, i_length, x_length, d_length):
+    """ Indices of points inside of the cube, computed in one pass without intermediate boolean arrays. """
+    indices = np.empty(len(points), dtype=np.int64)
+    n = 0
+    for i in range(len(points)):
+        il, xl, d = points[i, 0], points[i, 1], points[i, 2]
+        if 0 <= il < i_length and 0 <= xl < x_length and 0 <= d < d_length:
+            indices[n] = i
+            n += 1
+    return indices[:n]
 
 
 @njit(parallel=True)